@@ -1,42 +1,120 @@
 """
 XAgent base class for L3AGI integration
+
+XAgent is imported lazily so that importing this module does not pull in the
+XAgent dependency tree. ``BaseAgent``, ``Message`` and ``LLMStatusCode`` are
+resolved on first access (PEP 562 module ``__getattr__``), and
+``L3AGIXAgent`` only touches XAgent when an agent is constructed.
 """
 
+import functools
 import sys
 import os
 from typing import List, Dict, Any, Optional
 
-# Add XAgent to path for imports
-xagent_path = os.path.join(os.path.dirname(__file__), '..', '..', '..', '..', 'XAgent')
-sys.path.insert(0, xagent_path)
-
-try:
-    from XAgent.agent.base_agent import BaseAgent
-    from XAgent.message_history import Message
-    from XAgent.utils import LLMStatusCode
-    XAGENT_AVAILABLE = True
-except ImportError:
-    XAGENT_AVAILABLE = False
-    # Fallback classes for when XAgent is not available
-    class BaseAgent:
-        pass
+# Location of the XAgent checkout, added to sys.path on first use
+_XAGENT_PATH = os.path.normpath(
+    os.path.join(os.path.dirname(__file__), '..', '..', '..', '..', 'XAgent')
+)
+
+# Names resolved on first access by the module-level __getattr__
+_LAZY_XAGENT_NAMES = ("BaseAgent", "Message", "LLMStatusCode")
+
+
+# Fallback classes for when XAgent is not available
+class _FallbackBaseAgent:
+    pass
+
+
+class _FallbackMessage:
+    def __init__(self, role: str, content: str, timestamp=None):
+        self.role = role
+        self.content = content
+        self.timestamp = timestamp
+
+
+class _FallbackLLMStatusCode:
+    SUCCESS = "SUCCESS"
+    FAILED = "FAILED"
+    ERROR = "ERROR"
+
+
+@functools.lru_cache(maxsize=1)
+def _xagent_available() -> bool:
+    """Check once whether the XAgent modules we build on can be imported"""
+    if _XAGENT_PATH not in map(os.path.normpath, sys.path):
+        sys.path.insert(0, _XAGENT_PATH)
+    try:
+        import XAgent.agent.base_agent
+        import XAgent.message_history
+        import XAgent.utils
+        return True
+    except ImportError:
+        return False
+
+
+def _load_xagent():
+    """Import XAgent (or the fallbacks) and cache the symbols in module globals"""
+    if "BaseAgent" in globals():
+        return
     
-    class Message:
-        def __init__(self, role: str, content: str, timestamp=None):
-            self.role = role
-            self.content = content
-            self.timestamp = timestamp
+    if _xagent_available():
+        from XAgent.agent.base_agent import BaseAgent
+        from XAgent.message_history import Message
+        from XAgent.utils import LLMStatusCode
+    else:
+        BaseAgent = _FallbackBaseAgent
+        Message = _FallbackMessage
+        LLMStatusCode = _FallbackLLMStatusCode
     
-    class LLMStatusCode:
-        SUCCESS = "SUCCESS"
-        FAILED = "FAILED"
-        ERROR = "ERROR"
+    globals().update(
+        BaseAgent=BaseAgent,
+        Message=Message,
+        LLMStatusCode=LLMStatusCode,
+    )
+
+
+def __getattr__(name: str) -> Any:
+    if name in _LAZY_XAGENT_NAMES:
+        _load_xagent()
+        return globals()[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-class L3AGIXAgent(BaseAgent):
-    """Base XAgent class adapted for L3AGI framework"""
+
+@functools.lru_cache(maxsize=None)
+def _with_base_agent(cls: type) -> type:
+    """Return a subclass of ``cls`` that also inherits XAgent's BaseAgent"""
+    _load_xagent()
+    base_agent = globals()["BaseAgent"]
+    if issubclass(cls, base_agent):
+        return cls
+    
+    class AgentWithBase(cls, base_agent):
+        pass
+    
+    # Present the combined class under the name of the class it extends
+    AgentWithBase.__name__ = cls.__name__
+    AgentWithBase.__qualname__ = cls.__qualname__
+    AgentWithBase.__module__ = cls.__module__
+    AgentWithBase.__doc__ = cls.__doc__
+    return AgentWithBase
+
+
+class L3AGIXAgent:
+    """Base XAgent class adapted for L3AGI framework
+    
+    XAgent's BaseAgent cannot be named as a base class here without importing
+    XAgent when this module is imported. Instead, creating an agent
+    instantiates a cached subclass of the requested class that also inherits
+    BaseAgent, so agents are real BaseAgent instances with a single set of
+    attributes, and subclass overrides are seen by BaseAgent code.
+    """
+    
+    def __new__(cls, *args, **kwargs):
+        return super().__new__(_with_base_agent(cls))
     
-    def __init__(self, config: Dict[str, Any], prompt_messages: Optional[List[Message]] = None):
-        if XAGENT_AVAILABLE:
+    def __init__(self, config: Dict[str, Any], prompt_messages: Optional[List["Message"]] = None):
+        if _xagent_available():
             super().__init__(config, prompt_messages)
         else:
             self.config = config
@@ -72,14 +150,14 @@ class L3AGIXAgent(BaseAgent):
     
     def is_xagent_available(self) -> bool:
         """Check if XAgent framework is available"""
-        return XAGENT_AVAILABLE
+        return _xagent_available()
     
     def get_agent_info(self) -> Dict[str, Any]:
         """Get agent information"""
         return {
             "name": self.agent_name,
             "type": "XAgent",
-            "xagent_available": XAGENT_AVAILABLE,
+            "xagent_available": _xagent_available(),
             "l3agi_config": self.l3agi_config,
             "session_id": self.session_id,
             "sender_name": self.sender_name
@@ -2,24 +2,101 @@
 Safety wrapper for tool execution in XAgent
 """
 
+import contextvars
+import itertools
 import logging
-from typing import Any, Dict, Callable, Optional, List
+import re
+import reprlib
+from collections import deque
+import threading
+from concurrent.futures import Future, TimeoutError as FuturesTimeoutError
+from typing import Any, Dict, Callable, List, Optional, Tuple
 import time
-import traceback
+
+_LOG = logging.getLogger(__name__)
+
+# Potentially dangerous inputs, matched in a single pass over each input string
+_DANGEROUS_PATTERNS: Tuple[str, ...] = (
+    "eval(", "exec(", "import ", "os.system", "subprocess",
+    "file://", "http://", "https://", "ftp://"
+)
+_DANGEROUS_RE = re.compile("|".join(map(re.escape, _DANGEROUS_PATTERNS)))
+
+# How many levels of nested containers are walked item by item
+_MAX_SCAN_DEPTH = 4
+
+# Bounded repr used to scan whatever is nested below _MAX_SCAN_DEPTH
+_DEEP_REPR = reprlib.Repr()
+_DEEP_REPR.maxlevel = 16
+_DEEP_REPR.maxdict = _DEEP_REPR.maxlist = _DEEP_REPR.maxtuple = 100
+_DEEP_REPR.maxset = _DEEP_REPR.maxfrozenset = 100
+_DEEP_REPR.maxstring = 10000
+_DEEP_REPR.maxother = 200
+
+
+def _find_dangerous(value: Any, depth: int = 0) -> Optional[Tuple[str, bool]]:
+    """Find the first dangerous pattern in a string or in strings nested in containers
+    
+    Dict keys are scanned as well as values. Returns the matched pattern and
+    whether it was found below _MAX_SCAN_DEPTH, or None if nothing matched.
+    """
+    if isinstance(value, bytes):
+        value = value.decode("latin-1")
+    if isinstance(value, str):
+        match = _DANGEROUS_RE.search(value)
+        return (match.group(0), False) if match else None
+    
+    is_dict = isinstance(value, dict)
+    if not is_dict and not isinstance(value, (list, tuple, set, frozenset)):
+        # Other objects are not formatted, so their contents are never scanned
+        return None
+    
+    if depth >= _MAX_SCAN_DEPTH:
+        # Too deep to walk item by item; scan a bounded repr of the subtree instead
+        match = _DANGEROUS_RE.search(_DEEP_REPR.repr(value))
+        return (match.group(0), True) if match else None
+    
+    items = itertools.chain(value.keys(), value.values()) if is_dict else value
+    for item in items:
+        found = _find_dangerous(item, depth + 1)
+        if found:
+            return found
+    return None
+
 
 class ToolSafetyWrapper:
     """Wrapper to ensure safe tool execution"""
     
-    def __init__(self, enable_logging: bool = True):
-        self.logger = logging.getLogger(__name__) if enable_logging else None
-        self.execution_history = []
+    def __init__(self, enable_logging: bool = True, max_workers: int = 4):
+        self.logger = _LOG if enable_logging else None
+        # Keep only the last 1000 executions
+        self.execution_history = deque(maxlen=1000)
+        # Running totals over execution_history, kept in step by _record_execution
+        self._success_count = 0
+        self._total_time = 0.0
+        # Guards execution_history and the running totals when the wrapper is shared across threads
+        self._history_lock = threading.Lock()
+        # Sequence number making execution ids unique within this wrapper
+        self._exec_counter = itertools.count()
+        # Bounded repr for recorded results: builtin containers and strings are
+        # truncated while formatting, other types are formatted by their own
+        # __repr__ in full and only then truncated
+        self._repr = reprlib.Repr()
+        self._repr.maxstring = 200
+        self._repr.maxother = 200
+        self._repr.maxlist = 10
+        self._repr.maxdict = 10
         self.max_execution_time = 30  # seconds
         self.max_memory_usage = 100 * 1024 * 1024  # 100MB
+        # Caps tool threads alive at once, including abandoned timed-out ones
+        self.max_workers = max_workers
+        self._worker_slots = threading.BoundedSemaphore(max_workers)
     
     def execute_safely(self, tool_func: Callable, tool_name: str, *args, **kwargs) -> Any:
         """Execute tool with safety measures"""
-        start_time = time.time()
-        execution_id = f"{tool_name}_{int(start_time)}"
+        # Durations use the monotonic clock so wall-clock adjustments cannot skew them
+        start_time = time.monotonic()
+        execution_id = f"{tool_name}#{next(self._exec_counter)}"
         
         # Log execution start
         self._log_execution_start(execution_id, tool_name, args, kwargs)
@@ -35,7 +112,7 @@ class ToolSafetyWrapper:
             result = self._execute_with_timeout(tool_func, *args, **kwargs)
             
             # Log successful execution
-            execution_time = time.time() - start_time
+            execution_time = time.monotonic() - start_time
             self._log_execution_success(execution_id, tool_name, execution_time, result)
             
             # Record execution
@@ -45,7 +122,7 @@ class ToolSafetyWrapper:
             
         except Exception as e:
             # Log error
-            execution_time = time.time() - start_time
+            execution_time = time.monotonic() - start_time
             error_msg = f"Tool {tool_name} execution failed: {str(e)}"
             self._log_execution_error(execution_id, tool_name, error_msg)
             
@@ -65,16 +142,21 @@ class ToolSafetyWrapper:
             if len(kwargs) > 20:  # Limit number of keyword arguments
                 return False
             
-            # Check for potentially dangerous inputs
-            dangerous_patterns = [
-                "eval(", "exec(", "import ", "os.system", "subprocess",
-                "file://", "http://", "https://", "ftp://"
-            ]
+            if not args and not kwargs:
+                return True
             
-            input_str = str(args) + str(kwargs)
-            for pattern in dangerous_patterns:
-                if pattern in input_str:
-                    self._log_security_warning(tool_name, f"Potentially dangerous input: {pattern}")
+            # Check for potentially dangerous inputs, only strings can carry them
+            for value in itertools.chain(args, kwargs.values()):
+                found = _find_dangerous(value)
+                if found:
+                    pattern, too_deep = found
+                    if too_deep:
+                        self._log_security_warning(
+                            tool_name,
+                            f"Potentially dangerous input nested deeper than {_MAX_SCAN_DEPTH} levels: {pattern}"
+                        )
+                    else:
+                        self._log_security_warning(tool_name, f"Potentially dangerous input: {pattern}")
                     return False
             
             return True
@@ -84,48 +166,67 @@ class ToolSafetyWrapper:
             return False
     
     def _execute_with_timeout(self, tool_func: Callable, *args, **kwargs) -> Any:
-        """Execute tool with timeout protection"""
-        import signal
+        """Execute tool with timeout protection
         
-        def timeout_handler(signum, frame):
-            raise TimeoutError(f"Tool execution timed out after {self.max_execution_time} seconds")
+        Each call runs on its own daemon thread, so timeouts also work off the
+        main thread. A thread cannot be killed: a tool that times out is
+        abandoned and keeps running until it returns. Being a daemon thread,
+        it does not delay interpreter exit and is stopped abruptly at shutdown.
+        
+        At most max_workers tool threads may be alive at once; when all are
+        busy (e.g. with hung tools) the call fails immediately instead of
+        starting another thread. The tool runs in a copy of the caller's
+        context, so context variables set by the caller are visible to it.
+        """
+        if not self._worker_slots.acquire(blocking=False):
+            raise RuntimeError(f"Too many tool executions in progress (limit {self.max_workers})")
+        
+        future = Future()
+        context = contextvars.copy_context()
         
-        # Set timeout
-        signal.signal(signal.SIGALRM, timeout_handler)
-        signal.alarm(self.max_execution_time)
+        def run_tool():
+            try:
+                future.set_result(context.run(tool_func, *args, **kwargs))
+            except BaseException as e:
+                future.set_exception(e)
+            finally:
+                self._worker_slots.release()
         
         try:
-            result = tool_func(*args, **kwargs)
-            signal.alarm(0)  # Cancel timeout
-            return result
-        except TimeoutError:
-            signal.alarm(0)  # Cancel timeout
-            raise
-        except Exception:
-            signal.alarm(0)  # Cancel timeout
+            threading.Thread(target=run_tool, name="tool-safety", daemon=True).start()
+        except BaseException:
+            self._worker_slots.release()
             raise
+        
+        try:
+            return future.result(timeout=self.max_execution_time)
+        except FuturesTimeoutError:
+            raise TimeoutError(f"Tool execution timed out after {self.max_execution_time} seconds")
     
     def _log_execution_start(self, execution_id: str, tool_name: str, args: tuple, kwargs: dict):
         """Log the start of tool execution"""
-        if self.logger:
-            self.logger.info(f"Starting tool execution: {execution_id} - {tool_name}")
-            self.logger.debug(f"Args: {args}, Kwargs: {kwargs}")
+        # DEBUG is below INFO, so one INFO check covers both messages
+        if self.logger and self.logger.isEnabledFor(logging.INFO):
+            self.logger.info("Starting tool execution: %s - %s", execution_id, tool_name)
+            if self.logger.isEnabledFor(logging.DEBUG):
+                self.logger.debug("Args: %r, Kwargs: %r", args, kwargs)
     
     def _log_execution_success(self, execution_id: str, tool_name: str, execution_time: float, result: Any):
         """Log successful tool execution"""
-        if self.logger:
-            self.logger.info(f"Tool execution successful: {execution_id} - {tool_name} in {execution_time:.2f}s")
-            self.logger.debug(f"Result: {result}")
+        if self.logger and self.logger.isEnabledFor(logging.INFO):
+            self.logger.info("Tool execution successful: %s - %s in %.2fs", execution_id, tool_name, execution_time)
+            if self.logger.isEnabledFor(logging.DEBUG):
+                self.logger.debug("Result: %s", result)
     
     def _log_execution_error(self, execution_id: str, tool_name: str, error_msg: str):
         """Log tool execution error"""
         if self.logger:
-            self.logger.error(f"Tool execution failed: {execution_id} - {tool_name}: {error_msg}")
+            self.logger.error("Tool execution failed: %s - %s: %s", execution_id, tool_name, error_msg)
     
     def _log_security_warning(self, tool_name: str, warning_msg: str):
         """Log security warning"""
         if self.logger:
-            self.logger.warning(f"Security warning for {tool_name}: {warning_msg}")
+            self.logger.warning("Security warning for %s: %s", tool_name, warning_msg)
     
     def _record_execution(self, execution_id: str, tool_name: str, success: bool, 
                          execution_time: float, result: Any):
@@ -136,46 +237,61 @@ class ToolSafetyWrapper:
             "success": success,
             "execution_time": execution_time,
             "timestamp": time.time(),
-            "result": str(result)[:1000]  # Limit result length
+            "result": self._format_result(result)
         }
         
-        self.execution_history.append(execution_record)
-        
-        # Keep only last 1000 executions
-        if len(self.execution_history) > 1000:
-            self.execution_history = self.execution_history[-1000:]
+        with self._history_lock:
+            # Remove the contribution of the record the deque is about to evict
+            if len(self.execution_history) == self.execution_history.maxlen:
+                evicted = self.execution_history[0]
+                self._success_count -= evicted["success"]
+                self._total_time -= evicted["execution_time"]
+            
+            self.execution_history.append(execution_record)
+            self._success_count += success
+            self._total_time += execution_time
+    
+    def _format_result(self, result: Any) -> str:
+        """Convert a tool result to a length-limited string for the history"""
+        if isinstance(result, str):
+            return result[:1000]  # Limit result length
+        return self._repr.repr(result)
     
     def get_execution_stats(self) -> Dict[str, Any]:
         """Get execution statistics"""
-        if not self.execution_history:
-            return {"total_executions": 0}
-        
-        successful = [e for e in self.execution_history if e["success"]]
-        failed = [e for e in self.execution_history if not e["success"]]
+        with self._history_lock:
+            total = len(self.execution_history)
+            success_count = self._success_count
+            total_time = self._total_time
         
-        total_time = sum(e["execution_time"] for e in self.execution_history)
-        avg_time = total_time / len(self.execution_history) if self.execution_history else 0
+        if not total:
+            return {"total_executions": 0}
         
         return {
-            "total_executions": len(self.execution_history),
-            "successful_executions": len(successful),
-            "failed_executions": len(failed),
-            "success_rate": len(successful) / len(self.execution_history) if self.execution_history else 0,
-            "average_execution_time": avg_time,
+            "total_executions": total,
+            "successful_executions": success_count,
+            "failed_executions": total - success_count,
+            "success_rate": success_count / total,
+            "average_execution_time": total_time / total,
             "total_execution_time": total_time
         }
     
     def get_recent_executions(self, limit: int = 10) -> List[Dict[str, Any]]:
         """Get recent tool executions"""
-        return self.execution_history[-limit:] if self.execution_history else []
+        with self._history_lock:
+            start = max(0, len(self.execution_history) - limit)
+            return list(itertools.islice(self.execution_history, start, None))
     
     def clear_execution_history(self):
         """Clear execution history"""
-        self.execution_history.clear()
+        with self._history_lock:
+            self.execution_history.clear()
+            self._success_count = 0
+            self._total_time = 0.0
     
-    def set_max_execution_time(self, seconds: int):
+    def set_max_execution_time(self, seconds: float):
         """Set maximum execution time for tools"""
-        self.max_execution_time = max(1, seconds)  # Minimum 1 second
+        self.max_execution_time = max(0.1, seconds)  # Minimum 100ms
     
     def set_max_memory_usage(self, bytes_limit: int):
         """Set maximum memory usage for tools"""
@@ -2,111 +2,281 @@
 Tool adapter to integrate L3AGI tools with XAgent
 """
 
-from typing import List, Dict, Any, Callable, Optional
+from collections import OrderedDict
+from typing import FrozenSet, List, Dict, Any, Optional, Tuple
+import copy
+import functools
+import json
 import logging
+import threading
+
+_LOG = logging.getLogger(__name__)
+
+# Scalar types whose JSON encoding identifies the value and its type
+_JSON_SCALAR_TYPES = (str, int, float, bool, type(None))
+
+
+def _is_plain_json(value: Any) -> bool:
+    """Check that a value round-trips through JSON without losing its type
+    
+    Tuples, non-str dict keys and subclasses of the JSON types are rejected,
+    since JSON would encode them the same as a different value.
+    """
+    value_type = type(value)
+    if value_type in _JSON_SCALAR_TYPES:
+        return True
+    if value_type is list:
+        return all(_is_plain_json(item) for item in value)
+    if value_type is dict:
+        return all(type(key) is str and _is_plain_json(item) for key, item in value.items())
+    return False
+
 
 class L3AGIToolAdapter:
     """Adapter to make L3AGI tools compatible with XAgent"""
     
-    def __init__(self, tools: List[Any]):
+    def __init__(self, tools: List[Any], max_cache_entries: int = 512):
+        if max_cache_entries < 0:
+            raise ValueError(f"max_cache_entries must be >= 0, got {max_cache_entries}")
+        
         self.tools = tools
-        self.adapted_tools = self._adapt_tools()
-        self.logger = logging.getLogger(__name__)
+        
+        # Adapted tools are stored as one dict per attribute, keyed by tool name,
+        # with _names keeping every registration in order
+        self._names: List[str] = []
+        # Tools registered under an already used name, by position in _names
+        self._shadowed: Dict[int, Dict[str, Any]] = {}
+        self._funcs: Dict[str, Any] = {}
+        self._descs: Dict[str, str] = {}
+        self._params: Dict[str, Dict[str, Any]] = {}
+        self._types: Dict[str, str] = {}
+        self._originals: Dict[str, Any] = {}
+        # How each tool is invoked ("run", "call" or "noncallable"), resolved once
+        self._callkinds: Dict[str, str] = {}
+        # Tools that declare `cacheable = True` have their results memoized
+        self._cacheable: Dict[str, bool] = {}
+        self._result_cache: "OrderedDict[Tuple[str, str], Any]" = OrderedDict()
+        self.max_cache_entries = max_cache_entries
+        self._adapted_tools: Optional[List[Dict[str, Any]]] = None
+        # Validation only depends on the tool and the set of supplied keys
+        self._validate_cached = functools.lru_cache(maxsize=1024)(self._validate_impl)
+        
+        # Tools are adapted on first use, once, even if several threads race to it
+        self._adapted = False
+        self._adapt_lock = threading.Lock()
     
-    def _adapt_tools(self) -> List[Dict[str, Any]]:
+    def _adapt_tools(self):
         """Convert L3AGI tools to XAgent format"""
-        adapted = []
-        
         for tool in self.tools:
             try:
                 # Extract tool information
-                tool_info = {
-                    "name": getattr(tool, 'name', tool.__class__.__name__),
-                    "description": getattr(tool, 'description', ''),
-                    "parameters": getattr(tool, 'parameters', {}),
-                    "function": tool.run if hasattr(tool, 'run') else tool,
-                    "tool_type": "l3agi_tool",
-                    "original_tool": tool
-                }
-                adapted.append(tool_info)
-                self.logger.info(f"Adapted tool: {tool_info['name']}")
+                name = getattr(tool, 'name', tool.__class__.__name__)
+                self._register_tool(
+                    name,
+                    getattr(tool, 'description', ''),
+                    getattr(tool, 'parameters', {}),
+                    tool.run if hasattr(tool, 'run') else tool,
+                    "l3agi_tool",
+                    tool,
+                    cacheable=bool(getattr(tool, 'cacheable', False))
+                )
+                _LOG.info("Adapted tool: %s", name)
                 
             except Exception as e:
-                self.logger.warning(f"Failed to adapt tool {tool}: {e}")
-                # Create a basic tool info as fallback
-                tool_info = {
-                    "name": str(tool),
-                    "description": "L3AGI tool (fallback)",
-                    "parameters": {},
-                    "function": tool,
-                    "tool_type": "l3agi_tool_fallback",
-                    "original_tool": tool
-                }
-                adapted.append(tool_info)
+                _LOG.warning("Failed to adapt tool %s: %s", tool, e)
+                # Register basic tool info as fallback
+                self._register_tool(
+                    str(tool),
+                    "L3AGI tool (fallback)",
+                    {},
+                    tool,
+                    "l3agi_tool_fallback",
+                    tool
+                )
+    
+    def _ensure_adapted(self):
+        """Adapt the tools if this has not happened yet"""
+        if self._adapted:
+            return
+        with self._adapt_lock:
+            if not self._adapted:
+                self._adapt_tools()
+                self._adapted = True
+    
+    def _register_tool(self, name: str, description: str, parameters: Dict[str, Any],
+                       function: Any, tool_type: str, original_tool: Any,
+                       cacheable: bool = False):
+        """Store one adapted tool's attributes"""
+        # First tool registered under a name wins lookups; later ones stay listed
+        if name in self._funcs:
+            _LOG.warning("Duplicate tool name %s: lookups use the first tool registered", name)
+            self._shadowed[len(self._names)] = {
+                "name": name,
+                "description": description,
+                "parameters": parameters,
+                "function": function,
+                "tool_type": tool_type,
+                "original_tool": original_tool
+            }
+            self._names.append(name)
+            self._adapted_tools = None
+            return
+        
+        # Resolved before any state is touched, so a failure cannot leave a
+        # half-registered tool behind
+        callkind = self._resolve_callkind(function)
         
-        return adapted
+        self._names.append(name)
+        self._funcs[name] = function
+        self._descs[name] = description
+        self._params[name] = parameters
+        self._types[name] = tool_type
+        self._originals[name] = original_tool
+        self._cacheable[name] = cacheable
+        self._callkinds[name] = callkind
+        self._adapted_tools = None
+        self._validate_cached.cache_clear()
+    
+    @staticmethod
+    def _resolve_callkind(function: Any) -> str:
+        """Work out how a tool function is invoked"""
+        try:
+            if hasattr(function, 'run'):
+                return "run"
+            if callable(function):
+                return "call"
+        except Exception:
+            # e.g. a `run` property that raises something other than AttributeError
+            pass
+        return "noncallable"
+    
+    def _build_tool_info(self, tool_name: str) -> Dict[str, Any]:
+        """Assemble the XAgent tool dict for a registered tool"""
+        return {
+            "name": tool_name,
+            "description": self._descs[tool_name],
+            "parameters": self._params[tool_name],
+            "function": self._funcs[tool_name],
+            "tool_type": self._types[tool_name],
+            "original_tool": self._originals[tool_name]
+        }
+    
+    @property
+    def adapted_tools(self) -> List[Dict[str, Any]]:
+        return self.get_adapted_tools()
     
     def get_adapted_tools(self) -> List[Dict[str, Any]]:
         """Get tools in XAgent format"""
-        return self.adapted_tools
+        self._ensure_adapted()
+        if self._adapted_tools is None:
+            self._adapted_tools = [
+                self._shadowed[i] if i in self._shadowed else self._build_tool_info(name)
+                for i, name in enumerate(self._names)
+            ]
+        return self._adapted_tools
     
     def execute_tool(self, tool_name: str, **kwargs) -> Any:
         """Execute a specific tool"""
-        for tool_info in self.adapted_tools:
-            if tool_info["name"] == tool_name:
-                try:
-                    tool_func = tool_info["function"]
-                    if hasattr(tool_func, 'run'):
-                        result = tool_func.run(**kwargs)
-                    elif callable(tool_func):
-                        result = tool_func(**kwargs)
-                    else:
-                        result = f"Tool {tool_name} is not callable"
-                    
-                    self.logger.info(f"Executed tool {tool_name} successfully")
-                    return result
-                    
-                except Exception as e:
-                    error_msg = f"Tool {tool_name} execution failed: {str(e)}"
-                    self.logger.error(error_msg)
-                    return error_msg
+        self._ensure_adapted()
+        if tool_name not in self._funcs:
+            raise ValueError(f"Tool {tool_name} not found")
+        
+        tool_func = self._funcs[tool_name]
+        callkind = self._callkinds[tool_name]
+        
+        cache_key = None
+        if self._cacheable[tool_name]:
+            cache_key = self._result_cache_key(tool_name, kwargs)
+            if cache_key is not None and cache_key in self._result_cache:
+                self._result_cache.move_to_end(cache_key)
+                # Hand out a copy so callers cannot mutate the cached result
+                return copy.deepcopy(self._result_cache[cache_key])
         
-        raise ValueError(f"Tool {tool_name} not found")
+        try:
+            if callkind == "run":
+                result = tool_func.run(**kwargs)
+            elif callkind == "call":
+                result = tool_func(**kwargs)
+            else:
+                result = f"Tool {tool_name} is not callable"
+            
+            _LOG.info("Executed tool %s successfully", tool_name)
+            # Only successful results are cached, failures are always retried
+            if cache_key is not None:
+                self._cache_result(cache_key, result)
+            return result
+            
+        except Exception as e:
+            error_msg = f"Tool {tool_name} execution failed: {str(e)}"
+            _LOG.error(error_msg)
+            return error_msg
+    
+    def _result_cache_key(self, tool_name: str, kwargs: Dict[str, Any]) -> Optional[Tuple[str, str]]:
+        """Build a result cache key from the tool name and canonical JSON of its inputs"""
+        try:
+            # Inputs that are not plain JSON data have no reliable key and are not cached
+            if not _is_plain_json(kwargs):
+                return None
+            return tool_name, json.dumps(kwargs, sort_keys=True)
+        except (TypeError, ValueError, RecursionError):
+            return None
+    
+    def _cache_result(self, cache_key: Tuple[str, str], result: Any):
+        """Store a copy of a tool result, evicting the least recently used entry when full"""
+        try:
+            result = copy.deepcopy(result)
+        except Exception:
+            # Results that cannot be copied are not cached
+            return
+        
+        self._result_cache[cache_key] = result
+        self._result_cache.move_to_end(cache_key)
+        while len(self._result_cache) > self.max_cache_entries:
+            self._result_cache.popitem(last=False)
+    
+    def clear_result_cache(self):
+        """Drop all cached tool results"""
+        self._result_cache.clear()
     
     def get_tool_info(self, tool_name: str) -> Optional[Dict[str, Any]]:
         """Get information about a specific tool"""
-        for tool_info in self.adapted_tools:
-            if tool_info["name"] == tool_name:
-                return tool_info
-        return None
+        self._ensure_adapted()
+        if tool_name not in self._funcs:
+            return None
+        return self._build_tool_info(tool_name)
     
     def list_tools(self) -> List[str]:
         """List all available tool names"""
-        return [tool["name"] for tool in self.adapted_tools]
+        self._ensure_adapted()
+        return list(self._names)
     
     def validate_tool_input(self, tool_name: str, **kwargs) -> bool:
         """Validate input parameters for a tool"""
-        tool_info = self.get_tool_info(tool_name)
-        if not tool_info:
+        self._ensure_adapted()
+        return self._validate_cached(tool_name, frozenset(kwargs))
+    
+    def _validate_impl(self, tool_name: str, keys: FrozenSet[str]) -> bool:
+        """Check that the supplied keys cover a tool's required parameters"""
+        if tool_name not in self._params:
             return False
         
         # Basic validation - can be enhanced
-        required_params = tool_info.get("parameters", {}).get("required", [])
+        required_params = self._params[tool_name].get("required", [])
         for param in required_params:
-            if param not in kwargs:
+            if param not in keys:
                 return False
         
         return True
     
     def get_tool_schema(self, tool_name: str) -> Optional[Dict[str, Any]]:
         """Get the schema for a specific tool"""
-        tool_info = self.get_tool_info(tool_name)
-        if not tool_info:
+        self._ensure_adapted()
+        if tool_name not in self._funcs:
             return None
         
         return {
-            "name": tool_info["name"],
-            "description": tool_info["description"],
-            "parameters": tool_info["parameters"],
-            "type": tool_info["tool_type"]
+            "name": tool_name,
+            "description": self._descs[tool_name],
+            "parameters": self._params[tool_name],
+            "type": self._types[tool_name]
         }
@@ -13,9 +13,10 @@ def test_xagent_basics():
     print("=" * 30)
     
     try:
-        # Add XAgent to path
-        xagent_path = os.path.join(os.getcwd(), 'XAgent')
-        sys.path.insert(0, xagent_path)
+        # Add XAgent to path, unless it is already there
+        xagent_path = os.path.normpath(os.path.join(os.getcwd(), 'XAgent'))
+        if xagent_path not in map(os.path.normpath, sys.path):
+            sys.path.insert(0, xagent_path)
         
         # Try to import XAgent
         import XAgent
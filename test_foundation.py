@@ -68,6 +68,79 @@ def test_base_agent():
         print(f"❌ Base agent test failed: {e}")
         return False
 
+def test_base_agent_with_xagent():
+    """Test L3AGIXAgent against a stub XAgent BaseAgent"""
+    
+    print("\n🔧 Testing Base XAgent Class With XAgent Stub:")
+    print("-" * 45)
+    
+    import abc
+    import importlib.util
+    import types
+    
+    stub_names = ["XAgent", "XAgent.agent", "XAgent.agent.base_agent",
+                  "XAgent.message_history", "XAgent.utils"]
+    saved_modules = {name: sys.modules.get(name) for name in stub_names}
+    
+    try:
+        # In-memory stand-in shaped like XAgent's BaseAgent
+        class BaseAgent(metaclass=abc.ABCMeta):
+            def __init__(self, config, prompt_messages=None):
+                self.config = config
+                self.prompt_messages = prompt_messages or []
+            
+            @abc.abstractmethod
+            def parse(self, **args):
+                pass
+            
+            def fill_in_placeholders(self, placeholders):
+                return list(self.prompt_messages)
+            
+            def generate(self, **args):
+                return self.parse(**args)
+        
+        for name in stub_names:
+            sys.modules[name] = types.ModuleType(name)
+        sys.modules["XAgent.agent.base_agent"].BaseAgent = BaseAgent
+        sys.modules["XAgent.message_history"].Message = type("Message", (), {})
+        sys.modules["XAgent.utils"].LLMStatusCode = type("LLMStatusCode", (), {})
+        
+        # Load a fresh copy of the module so it probes the stub
+        spec = importlib.util.spec_from_file_location(
+            "_base_xagent_stub_check", os.path.join("agents", "xagent", "base_xagent.py"))
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        
+        class EchoAgent(module.L3AGIXAgent):
+            def parse(self, **args):
+                return "echo", args
+        
+        agent = EchoAgent({"test": "config"}, ["m1"])
+        assert agent.is_xagent_available(), "stub XAgent not detected"
+        assert isinstance(agent, BaseAgent) and isinstance(agent, EchoAgent), "agent is not a BaseAgent"
+        print("✅ Agent is a BaseAgent instance")
+        
+        agent.prompt_messages = ["new prompt"]
+        assert agent.fill_in_placeholders({}) == ["new prompt"], "BaseAgent sees stale state"
+        assert EchoAgent({}).prompt_messages == [], "prompt_messages not defaulted"
+        print("✅ BaseAgent methods share the agent's state")
+        
+        assert agent.generate(x=1) == ("echo", {"x": 1}), "subclass override not used"
+        print("✅ Subclass overrides reach BaseAgent code")
+        
+        return True
+        
+    except Exception as e:
+        print(f"❌ Base agent XAgent stub test failed: {e}")
+        return False
+    
+    finally:
+        for name, module in saved_modules.items():
+            if module is None:
+                sys.modules.pop(name, None)
+            else:
+                sys.modules[name] = module
+
 def test_tool_adapter():
     """Test the tool adapter"""
     
@@ -113,6 +186,64 @@ def test_tool_adapter():
         print(f"❌ Tool adapter test failed: {e}")
         return False
 
+def test_tool_result_cache():
+    """Test result caching for cacheable tools"""
+    
+    print("\n🔧 Testing Tool Result Cache:")
+    print("-" * 30)
+    
+    try:
+        from agents.xagent.tools.tool_adapter import L3AGIToolAdapter
+        
+        class CountingTool:
+            name = "CountingTool"
+            cacheable = True
+            
+            def __init__(self):
+                self.calls = 0
+            
+            def run(self, **kwargs):
+                self.calls += 1
+                return [self.calls]
+        
+        class Doc:
+            def __init__(self, text):
+                self.text = text
+        
+        tool = CountingTool()
+        adapter = L3AGIToolAdapter([tool])
+        
+        # Identical JSON inputs are served from the cache
+        first = adapter.execute_tool("CountingTool", query="q")
+        second = adapter.execute_tool("CountingTool", query="q")
+        assert first == second == [1] and tool.calls == 1, "cache miss on identical input"
+        print("✅ Repeated call served from cache")
+        
+        # Mutating a returned result must not change the cached value
+        second.append("mut")
+        assert adapter.execute_tool("CountingTool", query="q") == [1], "cached result was mutated"
+        print("✅ Cached result isolated from callers")
+        
+        # Non-JSON inputs bypass the cache instead of being keyed on their repr
+        adapter.execute_tool("CountingTool", doc=Doc("first"))
+        adapter.execute_tool("CountingTool", doc=Doc("second"))
+        assert tool.calls == 3, "non-JSON input was served from cache"
+        print("✅ Non-JSON inputs bypass the cache")
+        
+        # Inputs that JSON would encode identically must not share an entry
+        adapter.execute_tool("CountingTool", m={1: "x"})
+        adapter.execute_tool("CountingTool", m={"1": "x"})
+        adapter.execute_tool("CountingTool", m=(1, 2))
+        adapter.execute_tool("CountingTool", m=[1, 2])
+        assert tool.calls == 7, "different inputs shared a cache entry"
+        print("✅ Type-ambiguous inputs do not collide")
+        
+        return True
+        
+    except Exception as e:
+        print(f"❌ Tool result cache test failed: {e}")
+        return False
+
 def test_safety_wrapper():
     """Test the safety wrapper"""
     
@@ -140,6 +271,21 @@ def test_safety_wrapper():
         recent = safety.get_recent_executions(5)
         print(f"✅ Recent executions: {len(recent)}")
         
+        # Test input validation on nested inputs
+        def echo(data):
+            return data
+        
+        rejected = "Input validation failed for tool Echo"
+        assert safety.execute_safely(echo, "Echo", {"a": ["see http://x"]}) == rejected, "nested match accepted"
+        assert safety.execute_safely(echo, "Echo", {"import os": 1}) == rejected, "dict key not scanned"
+        deep_match = {"x": [[[[["os.system"]]]]]}
+        assert safety.execute_safely(echo, "Echo", deep_match) == rejected, "deep match accepted"
+        print("✅ Nested dangerous inputs rejected")
+        
+        for deep_input in ({"a": {"b": {"c": {"d": {"e": 1}}}}}, {"a": {"b": {"c": {"d": []}}}}):
+            assert safety.execute_safely(echo, "Echo", deep_input) == deep_input, "deep safe input rejected"
+        print("✅ Deeply nested safe inputs accepted")
+        
         return True
         
     except Exception as e:
@@ -202,12 +348,14 @@ if __name__ == "__main__":
     if imports_ok:
         # Test each component
         base_ok = test_base_agent()
+        base_stub_ok = test_base_agent_with_xagent()
         adapter_ok = test_tool_adapter()
+        cache_ok = test_tool_result_cache()
         safety_ok = test_safety_wrapper()
         structure_ok = test_directory_structure()
         
         # Show results
-        if all([base_ok, adapter_ok, safety_ok, structure_ok]):
+        if all([base_ok, base_stub_ok, adapter_ok, cache_ok, safety_ok, structure_ok]):
             show_next_steps()
         else:
             print("\n❌ Some tests failed. Check the errors above.")